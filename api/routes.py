@@ -1,14 +1,25 @@
 """
 API routes for FormFiller
 """
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, UploadFile, File, Form, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
+from typing import AsyncIterator, Optional
 import json
+import math
 import tempfile
 import shutil
 import os
 from services.whisper_service import get_whisper_service
 from services.ollama_service import get_ollama_service
+from services.admission_service import (
+    get_admission_service,
+    estimate_audio_seconds,
+    AdmissionRejected,
+    AdmissionTicket,
+)
 from utils.logger import logger
 
 router = APIRouter(prefix="/api", tags=["form-filling"])
@@ -22,8 +33,96 @@ class ProcessResponse(BaseModel):
     message: str
 
 
+def _save_upload_to_temp(audio_file: UploadFile) -> str:
+    """
+    Copy an uploaded audio file to a temporary file on disk
+    
+    Args:
+        audio_file: Audio file upload
+        
+    Returns:
+        Path to the temporary file (caller is responsible for cleanup)
+    """
+    original_filename = audio_file.filename or ""
+    
+    # Determine the extension to help Whisper identify the format
+    file_ext = os.path.splitext(original_filename)[1]
+    if not file_ext:
+        file_ext = ".wav"
+
+    temp_audio = tempfile.NamedTemporaryFile(suffix=file_ext, delete=False)
+    temp_file_path = temp_audio.name
+    
+    logger.info(f"Processing audio via temporary file: {temp_file_path}")
+    
+    try:
+        shutil.copyfileobj(audio_file.file, temp_audio)
+
+        # Flush the buffer to ensure data is physically written
+        temp_audio.flush()
+        temp_audio.close()
+    except Exception:
+        temp_audio.close()
+        _cleanup_temp_file(temp_file_path)
+        raise
+
+    return temp_file_path
+
+
+def _cleanup_temp_file(temp_file_path: str) -> None:
+    """Remove a temporary file, logging instead of raising on failure"""
+    try:
+        if os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+            logger.debug(f"Cleaned up temporary file: {temp_file_path}")
+    except Exception as cleanup_error:
+        logger.warning(f"Failed to clean up temporary file {temp_file_path}: {cleanup_error}")
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _admit_request(request: Request, temp_file_path: str, form_data: dict) -> AdmissionTicket:
+    """Run admission control using the audio duration and form field count"""
+    fields = form_data.get("fields", []) if isinstance(form_data, dict) else []
+    client_id = request.client.host if request.client else "unknown"
+    # Probing the container is blocking file I/O, so keep it off the event loop
+    audio_seconds, duration_is_exact = await run_in_threadpool(estimate_audio_seconds, temp_file_path)
+    return get_admission_service().admit(
+        client_id=client_id,
+        audio_seconds=audio_seconds,
+        field_count=len(fields),
+        duration_is_exact=duration_is_exact
+    )
+
+
+def _finish_stream(temp_file_path: str, ticket: AdmissionTicket) -> None:
+    """Remove the upload and refund the client if the stream never reached Whisper"""
+    _cleanup_temp_file(temp_file_path)
+    get_admission_service().refund_unused(ticket)
+
+
+def _retry_after_seconds(rejection: AdmissionRejected) -> Optional[int]:
+    """Whole seconds to wait before retrying, or None if retrying will not help"""
+    if rejection.retry_after is None:
+        return None
+    return max(1, math.ceil(rejection.retry_after))
+
+
+def _rejection_to_http(rejection: AdmissionRejected) -> HTTPException:
+    """Convert an admission rejection into an HTTP error with Retry-After"""
+    headers = None
+    retry_after = _retry_after_seconds(rejection)
+    if retry_after is not None:
+        headers = {"Retry-After": str(retry_after)}
+    return HTTPException(status_code=rejection.status_code, detail=rejection.message, headers=headers)
+
+
 @router.post("/process", response_model=ProcessResponse)
 async def process_audio(
+    request: Request,
     audio_file: UploadFile = File(...),
     form_data_json: str = Form(default="{}")
 ):
@@ -49,43 +148,29 @@ async def process_audio(
                 message="Invalid JSON in form_data_json"
             )
         
-        # Handle Audio File using tempfile
-        original_filename = audio_file.filename or ""
-        
-        # Determine the extension to help Whisper identify the format
-        file_ext = os.path.splitext(original_filename)[1]
-        if not file_ext:
-            file_ext = ".wav"
-
-        # Create a temporary file that auto-deletes on close
-        temp_audio = tempfile.NamedTemporaryFile(suffix=file_ext, delete=False)
-        temp_file_path = temp_audio.name
+        temp_file_path = _save_upload_to_temp(audio_file)
+        ticket = None
         
         try:
-            logger.info(f"Processing audio via temporary file: {temp_file_path}")
-            
-            shutil.copyfileobj(audio_file.file, temp_audio)
-            
-            # Flush the buffer to ensure data is physically written
-            temp_audio.flush()
-            temp_audio.close()
+            ticket = await _admit_request(request, temp_file_path, form_data)
             
-            # Transcribe audio using Whisper
+            # Transcribe audio using Whisper once this request's lane is served
             whisper_service = get_whisper_service()
-            transcribed_text = whisper_service.transcribe(temp_file_path)
+            transcribed_text = await get_admission_service().run_transcription(
+                ticket,
+                whisper_service.transcribe_segments(temp_file_path)
+            )
             
         finally:
-            # Clean up the temporary file
-            try:
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
-                    logger.debug(f"Cleaned up temporary file: {temp_file_path}")
-            except Exception as cleanup_error:
-                logger.warning(f"Failed to clean up temporary file {temp_file_path}: {cleanup_error}")
+            _cleanup_temp_file(temp_file_path)
+            if ticket is not None:
+                # No-op once Whisper was reached; refunds failures before that
+                get_admission_service().refund_unused(ticket)
         
         # Map text to form fields using Ollama
         ollama_service = get_ollama_service()
-        mapped_form_data = ollama_service.map_text_to_fields(
+        mapped_form_data = await run_in_threadpool(
+            ollama_service.map_text_to_fields,
             transcribed_text,
             json.dumps(form_data)
         )
@@ -99,6 +184,8 @@ async def process_audio(
         
         return response
         
+    except AdmissionRejected as e:
+        raise _rejection_to_http(e)
     except Exception as e:
         logger.error(f"Error in process endpoint: {str(e)}")
         # Ideally, log the full stack trace in production
@@ -108,4 +195,97 @@ async def process_audio(
             transcribed_text="",
             form_data={},
             message=f"Error processing audio: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.post("/process/stream")
+async def process_audio_stream(
+    request: Request,
+    audio_file: UploadFile = File(...),
+    form_data_json: str = Form(default="{}")
+):
+    """
+    Streaming variant of /process using Server-Sent Events
+    
+    Emits a `transcript` event once Whisper finishes, one `field` event per
+    mapped field as soon as it is parsed from the LLM output, and a final
+    `done` event. Failures are reported as an `error` event. Requests
+    rejected by admission control fail with 413/429/503 before streaming
+    starts; requests shed later carry `status_code` and `retry_after` in
+    their `error` event.
+    
+    Args:
+        audio_file: Audio file upload (WAV, MP3, OGG, etc.)
+        form_data_json: JSON string containing form structure and metadata
+        
+    Returns:
+        StreamingResponse with media type text/event-stream
+    """
+    try:
+        form_data = json.loads(form_data_json) if form_data_json else {}
+    except json.JSONDecodeError:
+        return StreamingResponse(
+            iter([_sse_event("error", {"message": "Invalid JSON in form_data_json"})]),
+            media_type="text/event-stream"
+        )
+    
+    # The upload must be persisted before returning, since the request body
+    # is no longer available once the response starts streaming
+    temp_file_path = _save_upload_to_temp(audio_file)
+    
+    try:
+        ticket = await _admit_request(request, temp_file_path, form_data)
+    except AdmissionRejected as e:
+        _cleanup_temp_file(temp_file_path)
+        raise _rejection_to_http(e)
+    except Exception:
+        _cleanup_temp_file(temp_file_path)
+        raise
+    
+    async def event_stream() -> AsyncIterator[str]:
+        # Blocking Whisper/LLM calls run in the threadpool to keep the event loop free
+        try:
+            try:
+                whisper_service = get_whisper_service()
+                transcribed_text = await get_admission_service().run_transcription(
+                    ticket,
+                    whisper_service.transcribe_segments(temp_file_path)
+                )
+            finally:
+                _cleanup_temp_file(temp_file_path)
+            
+            yield _sse_event("transcript", {"transcribed_text": transcribed_text})
+            
+            ollama_service = get_ollama_service()
+            field_count = 0
+            async for field_id, value in iterate_in_threadpool(
+                ollama_service.stream_text_to_fields(transcribed_text, json.dumps(form_data))
+            ):
+                field_count += 1
+                yield _sse_event("field", {"field_id": field_id, "value": value})
+            
+            yield _sse_event("done", {
+                "success": True,
+                "field_count": field_count,
+                "message": "Audio processed and form fields mapped successfully"
+            })
+            
+        except AdmissionRejected as e:
+            yield _sse_event("error", {
+                "message": e.message,
+                "status_code": e.status_code,
+                "retry_after": _retry_after_seconds(e)
+            })
+        except Exception as e:
+            logger.error(f"Error in streaming process endpoint: {str(e)}")
+            yield _sse_event("error", {"message": f"Error processing audio: {str(e)}"})
+    
+    # The generator's own cleanup never runs if the client disconnects before
+    # streaming starts, so also remove the upload (and refund an unused
+    # admission) once the response finishes
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(_finish_stream, temp_file_path, ticket)
+    )
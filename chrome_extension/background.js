@@ -97,63 +97,60 @@ async function handleAudioProcessing(audioBlobData, tabId) {
         updateState('BRAIN', '🧠 Activating AI brain & Supercharging intelligence...');
         await new Promise(resolve => setTimeout(resolve, 2500)); // Show for 2.5s
         
-        const backendUrl = CONFIG.BACKEND_URL + CONFIG.API_ENDPOINTS.process;
+        const backendUrl = CONFIG.BACKEND_URL + CONFIG.API_ENDPOINTS.processStream;
         
         const apiResponse = await fetch(backendUrl, {
             method: 'POST',
             body: formData
         });
         
+        if ([413, 429, 503].includes(apiResponse.status)) {
+            // Rejected by admission control (too long, rate limited or server too busy)
+            const body = await apiResponse.json().catch(() => ({}));
+            throw new Error(admissionErrorMessage(
+                body.detail || apiResponse.statusText,
+                apiResponse.headers.get('Retry-After')
+            ));
+        }
+
         if (!apiResponse.ok) {
             throw new Error(`Backend returned ${apiResponse.status}: ${apiResponse.statusText}`);
         }
         
-        const result = await apiResponse.json();
+        // 5. Fill form fields progressively as the backend streams them
+        const result = { success: false, transcribed_text: '', form_data: {}, message: '' };
+        const filler = createTabFiller(tabId);
         
-        if (!result.success) {
-            throw new Error(result.message || 'Backend processing failed');
+        try {
+            for await (const { event, data } of readServerSentEvents(apiResponse)) {
+                if (event === 'transcript') {
+                    result.transcribed_text = data.transcribed_text;
+                    console.log('Transcript received:', data.transcribed_text);
+                } else if (event === 'field') {
+                    if (Object.keys(result.form_data).length === 0) {
+                        updateState('FILLING', '✏️ Precision filling in progress...');
+                    }
+                    result.form_data[data.field_id] = data.value;
+                    console.log('Filling field:', data.field_id);
+                    await filler.fill({ [data.field_id]: data.value });
+                } else if (event === 'done') {
+                    result.success = true;
+                    result.message = data.message;
+                } else if (event === 'error') {
+                    if (data.status_code) {
+                        // Shed by admission control after the stream had started
+                        throw new Error(admissionErrorMessage(data.message, data.retry_after));
+                    }
+                    throw new Error(data.message || 'Backend processing failed');
+                }
+            }
+        } finally {
+            // Inject anything the content script could not take, even if the stream failed
+            await filler.flush();
         }
         
-        // 5. Fill form fields
-        console.log('Filling form with data:', result.form_data);
-        updateState('FILLING', '✏️ Precision filling in progress...');
-        await new Promise(resolve => setTimeout(resolve, 2000)); // Show for 2s
-        
-        try {
-            await chrome.tabs.sendMessage(tabId, {
-                action: 'fillFields',
-                data: result.form_data
-            });
-        } catch (fillError) {
-            console.error('Standard fill failed, trying scripting injection:', fillError);
-            // Fallback: inject script directly
-            await chrome.scripting.executeScript({
-                target: { tabId: tabId },
-                func: (data) => {
-                    console.log('Direct fill with data:', data);
-                    Object.entries(data).forEach(([fieldId, value]) => {
-                        if (!value) return;
-                        const element = document.getElementById(fieldId) || document.querySelector(`[name="${fieldId}"]`);
-                        if (element) {
-                             // React hack for valued inputs
-                            const nativeInputValueSetter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, "value").set;
-                            const nativeTextAreaValueSetter = Object.getOwnPropertyDescriptor(window.HTMLTextAreaElement.prototype, "value").set;
-                            
-                            if (element.tagName.toLowerCase() === 'textarea' && nativeTextAreaValueSetter) {
-                                nativeTextAreaValueSetter.call(element, value);
-                            } else if (nativeInputValueSetter && element.tagName.toLowerCase() !== 'select') {
-                                nativeInputValueSetter.call(element, value);
-                            } else {
-                                element.value = value;
-                            }
-
-                            element.dispatchEvent(new Event('input', { bubbles: true }));
-                            element.dispatchEvent(new Event('change', { bubbles: true }));
-                        }
-                    });
-                },
-                args: [result.form_data]
-            });
+        if (!result.success) {
+            throw new Error('Backend stream ended unexpectedly');
         }
         
         console.log('Processing completed successfully.');
@@ -168,6 +165,116 @@ async function handleAudioProcessing(audioBlobData, tabId) {
     }
 }
 
+/**
+ * Build a user-facing message for a request rejected by admission control
+ */
+function admissionErrorMessage(detail, retryAfter) {
+    const hint = retryAfter ? ` Try again in ${retryAfter}s.` : '';
+    return `${detail}.${hint}`;
+}
+
+/**
+ * Parse a Server-Sent Events response body into { event, data } objects
+ */
+async function* readServerSentEvents(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            const dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) event = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            });
+            
+            if (dataLines.length > 0) {
+                yield { event, data: JSON.parse(dataLines.join('\n')) };
+            }
+        }
+    }
+}
+
+/**
+ * Create a filler for fields streamed one at a time into a tab
+ * Only the first filled field scrolls the page. If the content script is
+ * unreachable, remaining fields are collected and injected once in flush().
+ */
+function createTabFiller(tabId) {
+    let scrolled = false;
+    let pendingInjection = null;
+    
+    return {
+        async fill(data) {
+            if (pendingInjection) {
+                Object.assign(pendingInjection, data);
+                return;
+            }
+            try {
+                const response = await chrome.tabs.sendMessage(tabId, {
+                    action: 'fillFields',
+                    data: data,
+                    scroll: !scrolled
+                });
+                scrolled = scrolled || Boolean(response && response.scrolled);
+            } catch (fillError) {
+                console.error('Standard fill failed, will use scripting injection:', fillError);
+                pendingInjection = { ...data };
+            }
+        },
+        
+        async flush() {
+            if (pendingInjection && Object.keys(pendingInjection).length > 0) {
+                await injectFieldValues(tabId, pendingInjection);
+            }
+            pendingInjection = null;
+        }
+    };
+}
+
+/**
+ * Fallback: fill fields by injecting a script directly into the tab
+ */
+async function injectFieldValues(tabId, data) {
+    await chrome.scripting.executeScript({
+        target: { tabId: tabId },
+        func: (data) => {
+            console.log('Direct fill with data:', data);
+            Object.entries(data).forEach(([fieldId, value]) => {
+                if (!value) return;
+                const element = document.getElementById(fieldId) || document.querySelector(`[name="${fieldId}"]`);
+                if (element) {
+                     // React hack for valued inputs
+                    const nativeInputValueSetter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, "value").set;
+                    const nativeTextAreaValueSetter = Object.getOwnPropertyDescriptor(window.HTMLTextAreaElement.prototype, "value").set;
+                    
+                    if (element.tagName.toLowerCase() === 'textarea' && nativeTextAreaValueSetter) {
+                        nativeTextAreaValueSetter.call(element, value);
+                    } else if (nativeInputValueSetter && element.tagName.toLowerCase() !== 'select') {
+                        nativeInputValueSetter.call(element, value);
+                    } else {
+                        element.value = value;
+                    }
+
+                    element.dispatchEvent(new Event('input', { bubbles: true }));
+                    element.dispatchEvent(new Event('change', { bubbles: true }));
+                }
+            });
+        },
+        args: [data]
+    });
+}
+
 // Log when service worker activates
 chrome.runtime.onInstalled.addListener(() => {
     console.log('FormFiller extension installed');
@@ -10,6 +10,7 @@ const CONFIG = {
     // API endpoints
     API_ENDPOINTS: {
         process: '/api/process',
+        processStream: '/api/process/stream',
         health: '/health'
     },
     
@@ -30,8 +30,8 @@ chrome.runtime.onMessage.addListener((request, _sender, sendResponse) => {
             if (!request.data || typeof request.data !== 'object') {
                 throw new Error('Invalid data for fillFields');
             }
-            fillFormFields(request.data);
-            sendResponse({ status: 'fields_filled' });
+            const scrolled = fillFormFields(request.data, { scroll: request.scroll !== false });
+            sendResponse({ status: 'fields_filled', scrolled: scrolled });
         }
         
         if (request.action === 'startRecording') {
@@ -75,14 +75,19 @@ function formatDate(value, useISOFormat = false) {
     return valStr;
 }
 
-function fillFormFields(fieldData) {
+/**
+ * Fill form fields with the provided values
+ * Pass { scroll: false } when fields arrive one by one and an earlier
+ * call has already scrolled the page. Returns true if this call scrolled.
+ */
+function fillFormFields(fieldData, { scroll = true } = {}) {
     if (!fieldData || typeof fieldData !== 'object') {
         console.error('Invalid field data:', fieldData);
-        return;
+        return false;
     }
     
     // Track if we have scrolled to the first element yet
-    let hasScrolled = false;
+    let hasScrolled = !scroll;
     
     Object.entries(fieldData).forEach(([fieldId, value]) => {
         // Skip null/undefined/empty values
@@ -243,6 +248,8 @@ function fillFormFields(fieldData) {
             console.warn(`Field not found: ${fieldId}`);
         }
     });
+    
+    return scroll && hasScrolled;
 }
 
 export { fillFormFields };
\ No newline at end of file
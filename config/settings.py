@@ -25,7 +25,18 @@ class Settings(BaseSettings):
     UPLOAD_DIR: str = "temp_uploads"
     WHISPER_MODEL: str = "medium"  # Options: tiny, base, small, medium, large-v3
     WHISPER_DEVICE: str = "cuda"  # Options: cpu, cuda
-    
+
+    # Admission control (costs are estimated seconds of model time)
+    ADMISSION_TRANSCRIBE_COST_PER_AUDIO_SECOND: float = 0.5
+    ADMISSION_MAPPING_COST_PER_FIELD: float = 0.3
+    ADMISSION_FALLBACK_AUDIO_BYTES_PER_SECOND: int = 16000  # Typical Opus recorder rate, used if timestamps are unreadable
+    ADMISSION_BUCKET_CAPACITY: float = 120.0  # Per-client burst budget
+    ADMISSION_BUCKET_REFILL_PER_SECOND: float = 0.5
+    ADMISSION_BUCKET_IDLE_TTL_SECONDS: float = 600.0  # Idle, full buckets are forgotten after this
+    ADMISSION_INTERACTIVE_MAX_AUDIO_SECONDS: float = 30.0  # Longer clips go to the batch lane
+    ADMISSION_INTERACTIVE_DEADLINE_SECONDS: float = 30.0
+    ADMISSION_BATCH_DEADLINE_SECONDS: float = 300.0
+
     # Ollama
     OLLAMA_MODEL: str = "ministral-3:3b"
     OLLAMA_BASE_URL: str = "http://localhost:11434"
@@ -1,5 +1,10 @@
 """Services module"""
 from .whisper_service import get_whisper_service, WhisperService
 from .ollama_service import get_ollama_service, OllamaService
+from .admission_service import get_admission_service, AdmissionService, AdmissionRejected
 
-__all__ = ["get_whisper_service", "WhisperService", "get_ollama_service", "OllamaService"]
+__all__ = [
+    "get_whisper_service", "WhisperService",
+    "get_ollama_service", "OllamaService",
+    "get_admission_service", "AdmissionService", "AdmissionRejected",
+]
@@ -0,0 +1,423 @@
+"""
+Admission control for the shared Whisper model
+
+Estimates each request's cost from audio duration and field count, enforces
+per-client token buckets, and schedules transcription through two priority
+lanes. Batch jobs hand the model over to waiting interactive clips between
+Whisper segments, so short clips never queue behind a long recording.
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Tuple
+from config.settings import settings
+from utils.logger import logger
+
+LANE_INTERACTIVE = "interactive"
+LANE_BATCH = "batch"
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is rate limited or shed before using the model"""
+
+    def __init__(self, message: str, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket measured in estimated seconds of model time"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.last_used_at = self.updated_at
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def try_consume(self, cost: float) -> Optional[float]:
+        """
+        Consume tokens for a request
+
+        Requests costlier than the whole bucket are let through once it is
+        full, leaving the client in debt until it refills.
+
+        Returns:
+            None if consumed, otherwise seconds until the request would fit
+        """
+        self._refill()
+        self.last_used_at = self.updated_at
+        required = min(cost, self.capacity)
+        if self.tokens >= required:
+            self.tokens -= cost
+            return None
+        return (required - self.tokens) / self.refill_per_second
+
+    def refund(self, cost: float) -> None:
+        """Give back tokens for work that never reached the model"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+    def is_idle(self, ttl: float) -> bool:
+        """Whether the bucket is full and unused for `ttl` seconds (safe to forget)"""
+        self._refill()
+        return self.tokens >= self.capacity and self.updated_at - self.last_used_at >= ttl
+
+
+@dataclass(eq=False)
+class AdmissionTicket:
+    """An admitted request waiting for (or holding) the Whisper model"""
+    client_id: str
+    lane: str
+    audio_seconds: float
+    transcribe_cost: float
+    total_cost: float
+    deadline: float
+    bucket: TokenBucket = field(repr=False)
+    transcribed_seconds: float = 0.0
+    started: bool = False
+    refunded: bool = False
+    granted: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def remaining_cost(self) -> float:
+        """Estimated model time still needed to finish transcription"""
+        remaining_audio = max(0.0, self.audio_seconds - self.transcribed_seconds)
+        return remaining_audio * settings.ADMISSION_TRANSCRIBE_COST_PER_AUDIO_SECOND
+
+
+def estimate_audio_seconds(audio_file_path: str) -> Tuple[float, bool]:
+    """
+    Estimate the duration of an audio file without decoding it
+
+    Uses the container duration via PyAV (installed with faster-whisper).
+    Browser recordings (MediaRecorder WEBM) carry no duration and usually no
+    per-packet durations either, so the timestamp of the last packet is used
+    instead, which only demuxes and is cheap. If that fails too, fall back to
+    a typical Opus byte rate.
+
+    Args:
+        audio_file_path: Path to the audio file
+
+    Returns:
+        Tuple of (duration in seconds, whether it was read from the file
+        rather than guessed from its size)
+    """
+    try:
+        import av
+
+        with av.open(audio_file_path) as container:
+            if container.duration:
+                return container.duration / av.time_base, True
+
+            stream = container.streams.audio[0]
+            first_pts = None
+            end_pts = None
+            for packet in container.demux(stream):
+                if packet.pts is None or packet.time_base is None:
+                    continue
+                start = float(packet.pts * packet.time_base)
+                end = float((packet.pts + (packet.duration or 0)) * packet.time_base)
+                first_pts = start if first_pts is None else min(first_pts, start)
+                end_pts = end if end_pts is None else max(end_pts, end)
+            if end_pts is not None and end_pts > first_pts:
+                return end_pts - first_pts, True
+    except Exception as e:
+        logger.debug(f"Could not read audio duration from container: {e}")
+
+    return os.path.getsize(audio_file_path) / settings.ADMISSION_FALLBACK_AUDIO_BYTES_PER_SECOND, False
+
+
+class AdmissionService:
+    """Rate limiting and priority scheduling in front of the Whisper model"""
+
+    def __init__(self):
+        """Initialize client buckets and lane queues"""
+        self._buckets: dict[str, TokenBucket] = {}
+        self._last_eviction = time.monotonic()
+        self._lanes: dict[str, deque] = {LANE_INTERACTIVE: deque(), LANE_BATCH: deque()}
+        self._running: Optional[AdmissionTicket] = None
+
+    def admit(
+        self,
+        client_id: str,
+        audio_seconds: float,
+        field_count: int,
+        duration_is_exact: bool = True
+    ) -> AdmissionTicket:
+        """
+        Estimate the cost of a request and decide whether to accept it
+
+        The lane deadline only governs access to Whisper, so only the
+        transcription cost is checked against it. The LLM mapping cost is
+        still charged to the client's bucket.
+
+        Args:
+            client_id: Identifier of the calling client
+            audio_seconds: Estimated audio duration
+            field_count: Number of form fields to map
+            duration_is_exact: False if audio_seconds was guessed from the
+                file size, in which case the request is never rejected as
+                too long on that guess alone
+
+        Returns:
+            AdmissionTicket to pass to run_transcription()
+
+        Raises:
+            AdmissionRejected: 413 if the recording can never fit its lane's
+                deadline, 503 if it cannot right now, 429 if the client is
+                over its budget
+        """
+        transcribe_cost = audio_seconds * settings.ADMISSION_TRANSCRIBE_COST_PER_AUDIO_SECOND
+        total_cost = transcribe_cost + field_count * settings.ADMISSION_MAPPING_COST_PER_FIELD
+
+        if audio_seconds <= settings.ADMISSION_INTERACTIVE_MAX_AUDIO_SECONDS:
+            lane, budget = LANE_INTERACTIVE, settings.ADMISSION_INTERACTIVE_DEADLINE_SECONDS
+        else:
+            lane, budget = LANE_BATCH, settings.ADMISSION_BATCH_DEADLINE_SECONDS
+
+        if transcribe_cost > budget:
+            if duration_is_exact:
+                logger.warning(f"Rejecting {lane} request from {client_id}: {audio_seconds:.1f}s of audio is too long")
+                raise AdmissionRejected("Recording is too long to process", status_code=413)
+            # Only a size-based guess: schedule it as if it just fits
+            audio_seconds = budget / settings.ADMISSION_TRANSCRIBE_COST_PER_AUDIO_SECOND
+            transcribe_cost = budget
+            total_cost = transcribe_cost + field_count * settings.ADMISSION_MAPPING_COST_PER_FIELD
+
+        expected_wait = self._estimate_wait(lane)
+        if expected_wait + transcribe_cost > budget:
+            logger.warning(
+                f"Shedding {lane} request from {client_id}: "
+                f"expected {expected_wait + transcribe_cost:.1f}s exceeds {budget:.0f}s deadline"
+            )
+            raise AdmissionRejected(
+                "Server is busy and cannot finish this request in time",
+                status_code=503,
+                retry_after=expected_wait + transcribe_cost - budget
+            )
+
+        self._evict_idle_buckets()
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = TokenBucket(settings.ADMISSION_BUCKET_CAPACITY, settings.ADMISSION_BUCKET_REFILL_PER_SECOND)
+            self._buckets[client_id] = bucket
+
+        retry_after = bucket.try_consume(total_cost)
+        if retry_after is not None:
+            logger.warning(f"Rate limited {client_id}: retry in {retry_after:.1f}s")
+            raise AdmissionRejected("Too many requests", status_code=429, retry_after=retry_after)
+
+        logger.info(
+            f"Admitted {lane} request from {client_id}: "
+            f"{audio_seconds:.1f}s audio, {field_count} fields, cost {total_cost:.1f}s"
+        )
+        return AdmissionTicket(
+            client_id=client_id,
+            lane=lane,
+            audio_seconds=audio_seconds,
+            transcribe_cost=transcribe_cost,
+            total_cost=total_cost,
+            deadline=time.monotonic() + budget,
+            bucket=bucket
+        )
+
+    def refund_unused(self, ticket: AdmissionTicket) -> None:
+        """Credit a ticket's cost back to its client if it never reached the model"""
+        if ticket.started or ticket.refunded:
+            return
+        ticket.refunded = True
+        ticket.bucket.refund(ticket.total_cost)
+
+    def _evict_idle_buckets(self) -> None:
+        """Forget full buckets of clients idle past the TTL so memory stays bounded"""
+        ttl = settings.ADMISSION_BUCKET_IDLE_TTL_SECONDS
+        now = time.monotonic()
+        if now - self._last_eviction < ttl:
+            return
+        self._last_eviction = now
+        for client_id, bucket in list(self._buckets.items()):
+            if bucket.is_idle(ttl):
+                del self._buckets[client_id]
+
+    def _estimate_wait(self, lane: str) -> float:
+        """Estimate seconds until a new request in the given lane gets the model"""
+        wait = 0.0
+        # A running batch job yields at its next segment, so it does not delay interactive work
+        running = self._running
+        if running is not None and (lane == LANE_BATCH or running.lane == LANE_INTERACTIVE):
+            wait += running.remaining_cost
+
+        wait += sum(t.remaining_cost for t in self._lanes[LANE_INTERACTIVE])
+        if lane == LANE_BATCH:
+            wait += sum(t.remaining_cost for t in self._lanes[LANE_BATCH])
+        return wait
+
+    async def run_transcription(self, ticket: AdmissionTicket, segments: Iterator) -> str:
+        """
+        Transcribe under the scheduler, one Whisper segment at a time
+
+        Waiting requests are granted the model interactive lane first. A
+        request still waiting when it can no longer meet its deadline is
+        shed (and refunded) instead of being run. A batch job gives up the
+        model between segments whenever an interactive clip is waiting, and
+        is shed if that pause makes it miss its own deadline.
+
+        Args:
+            ticket: Ticket returned by admit()
+            segments: Lazy segment iterator from WhisperService.transcribe_segments()
+
+        Returns:
+            Transcribed text
+
+        Raises:
+            AdmissionRejected: 503 if the deadline can no longer be met
+        """
+        await self._acquire(ticket)
+        ticket.started = True
+
+        texts = []
+        pending = None
+        try:
+            while True:
+                # Blocking decode runs in a worker thread to keep the event loop free.
+                # Shielded so a cancelled request cannot abandon a running decode.
+                pending = asyncio.ensure_future(asyncio.to_thread(next, segments, None))
+                segment = await asyncio.shield(pending)
+                pending = None
+                if segment is None:
+                    break
+                texts.append(segment.text)
+                ticket.transcribed_seconds = segment.end
+
+                if ticket.lane == LANE_BATCH and self._lanes[LANE_INTERACTIVE]:
+                    await self._yield_to_interactive(ticket)
+        finally:
+            if pending is not None and not pending.done():
+                # Cancelled mid-segment: the worker thread is still using the
+                # model, so keep holding it until that segment returns
+                pending.add_done_callback(
+                    lambda future: self._finish_after_segment(future, ticket, segments)
+                )
+            else:
+                self._finish_transcription(ticket, segments)
+
+        return " ".join(texts)
+
+    def _finish_after_segment(self, future: asyncio.Future, ticket: AdmissionTicket, segments: Iterator) -> None:
+        """Release the model once an abandoned segment decode has returned"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.debug(f"Abandoned transcription segment failed: {future.exception()}")
+        self._finish_transcription(ticket, segments)
+
+    def _finish_transcription(self, ticket: AdmissionTicket, segments: Iterator) -> None:
+        """Close the segment generator and release the model"""
+        close = getattr(segments, "close", None)
+        if close is not None:
+            close()
+        self._release(ticket)
+
+    async def _acquire(self, ticket: AdmissionTicket) -> None:
+        """Queue a ticket and wait until it is granted the model or its deadline passes"""
+        ticket.granted = asyncio.get_running_loop().create_future()
+        self._lanes[ticket.lane].append(ticket)
+        self._dispatch()
+
+        try:
+            timeout = ticket.deadline - time.monotonic() - ticket.transcribe_cost
+            await asyncio.wait_for(asyncio.shield(ticket.granted), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self._withdraw(ticket)
+            self.refund_unused(ticket)
+            logger.warning(f"Shedding {ticket.lane} request from {ticket.client_id}: deadline missed while queued")
+            raise AdmissionRejected(
+                "Server is busy and cannot finish this request in time",
+                status_code=503,
+                retry_after=self._estimate_wait(ticket.lane)
+            )
+        except asyncio.CancelledError:
+            # Client went away while queued
+            self._withdraw(ticket)
+            self.refund_unused(ticket)
+            raise
+
+    async def _yield_to_interactive(self, ticket: AdmissionTicket) -> None:
+        """
+        Put a running batch job back at the head of its lane and wait to resume
+
+        The batch deadline still applies while paused: a job that can no
+        longer finish in time is shed rather than kept waiting behind
+        interactive traffic. Its unused cost (remaining transcription and
+        the LLM mapping) is refunded; model time already spent is not.
+        """
+        logger.info(f"Pausing batch request from {ticket.client_id} for interactive work")
+        ticket.granted = asyncio.get_running_loop().create_future()
+        self._lanes[LANE_BATCH].appendleft(ticket)
+        self._running = None
+        self._dispatch()
+
+        try:
+            timeout = ticket.deadline - time.monotonic() - ticket.remaining_cost
+            await asyncio.wait_for(asyncio.shield(ticket.granted), timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self._withdraw(ticket)
+            ticket.bucket.refund(ticket.remaining_cost + ticket.total_cost - ticket.transcribe_cost)
+            logger.warning(f"Shedding paused batch request from {ticket.client_id}: deadline missed")
+            raise AdmissionRejected(
+                "Server is busy and cannot finish this request in time",
+                status_code=503,
+                retry_after=self._estimate_wait(LANE_BATCH)
+            )
+        except asyncio.CancelledError:
+            self._withdraw(ticket)
+            raise
+
+    def _dispatch(self) -> None:
+        """Hand the model to the next waiting request, interactive lane first"""
+        if self._running is not None:
+            return
+        for lane in (LANE_INTERACTIVE, LANE_BATCH):
+            if self._lanes[lane]:
+                ticket = self._lanes[lane].popleft()
+                self._running = ticket
+                ticket.granted.set_result(None)
+                return
+
+    def _withdraw(self, ticket: AdmissionTicket) -> None:
+        """Remove a ticket that gave up waiting, releasing the model if it was granted meanwhile"""
+        if ticket in self._lanes[ticket.lane]:
+            self._lanes[ticket.lane].remove(ticket)
+        else:
+            self._release(ticket)
+
+    def _release(self, ticket: AdmissionTicket) -> None:
+        """Release the model and dispatch the next request"""
+        if self._running is ticket:
+            self._running = None
+        self._dispatch()
+
+
+# Singleton instance
+_admission_service = None
+
+
+def get_admission_service() -> AdmissionService:
+    """
+    Get or create Admission service instance
+
+    Returns:
+        AdmissionService instance
+    """
+    global _admission_service
+    if _admission_service is None:
+        _admission_service = AdmissionService()
+    return _admission_service
@@ -1,6 +1,7 @@
 """
 LLM service for form field mapping
 """
+from typing import Any, Iterator
 from langchain_ollama import ChatOllama
 from config.settings import settings
 from dotenv import load_dotenv
@@ -82,6 +83,58 @@ class OllamaService:
             logger.error(f"Error during field mapping: {str(e)}")
             return {}
     
+    def stream_text_to_fields(self, transcribed_text: str, fields_json: str) -> Iterator[tuple[str, Any]]:
+        """
+        Stream mapped form fields as soon as each one is complete in the LLM output
+        
+        The JSON parser yields progressively larger partial objects while tokens
+        arrive. A field's value is only final once the next key starts (or the
+        stream ends), so each field is emitted at that point.
+        
+        Args:
+            transcribed_text: The transcribed audio text
+            fields_json: JSON string containing form fields structure
+            
+        Yields:
+            Tuples of (field_id, post-processed value)
+        """
+        if self.model is None:
+            raise RuntimeError("Model is not initialized")
+        
+        logger.info(f"Streaming transcription: {transcribed_text[:50]}...")
+        
+        prompt_template, parser = get_form_mapping_prompt()
+        chain = prompt_template | self.model | parser
+        
+        emitted = set()
+        mapped_data = {}
+        for partial in chain.stream({
+            "fields_json": fields_json,
+            "transcribed_text": transcribed_text
+        }):
+            if not isinstance(partial, dict):
+                continue
+            candidate = partial.get("mapped_fields") or {}
+            if not isinstance(candidate, dict):
+                continue
+            mapped_data = candidate
+            
+            # Every key except the last one seen has a finished value
+            for key in list(mapped_data.keys())[:-1]:
+                if key in emitted:
+                    continue
+                emitted.add(key)
+                yield from self._post_process_fields({key: mapped_data[key]}).items()
+        
+        # Flush whatever remains once the stream has ended
+        for key, value in mapped_data.items():
+            if key in emitted:
+                continue
+            emitted.add(key)
+            yield from self._post_process_fields({key: value}).items()
+        
+        logger.info(f"Streamed {len(emitted)} mapped fields")
+    
     def _post_process_fields(self, fields: dict) -> dict:
         """
         Post-process extracted fields to ensure correct formatting
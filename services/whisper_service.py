@@ -1,6 +1,7 @@
 """
 Whisper transcription service for FormFiller
 """
+from typing import Iterator
 from faster_whisper import WhisperModel
 from config.settings import settings
 from utils.logger import logger
@@ -39,6 +40,27 @@ class WhisperService:
         Returns:
             Transcribed text
             
+        Raises:
+            Exception: If transcription fails
+        """
+        # Combine all segments into single text
+        transcribed_text = " ".join(segment.text for segment in self.transcribe_segments(audio_file_path))
+        logger.debug(f"Transcribed text: {transcribed_text}")
+        return transcribed_text
+    
+    def transcribe_segments(self, audio_file_path: str) -> Iterator:
+        """
+        Transcribe audio file lazily, one segment at a time
+        
+        Faster-Whisper only decodes the next segment when it is requested, so
+        callers can pause between segments (e.g. to let other work use the model).
+        
+        Args:
+            audio_file_path: Path to the audio file
+            
+        Yields:
+            Faster-Whisper segments (with `text`, `start` and `end` in seconds)
+            
         Raises:
             Exception: If transcription fails
         """
@@ -54,13 +76,9 @@ class WhisperService:
                 language="en"
             )
             
-            # Combine all segments into single text
-            transcribed_text = " ".join(segment.text for segment in segments)
+            yield from segments
             
             logger.info(f"Transcription completed. Detected language: {info.language}")
-            logger.debug(f"Transcribed text: {transcribed_text}")
-            
-            return transcribed_text
             
         except Exception as e:
             logger.error(f"Error during transcription: {str(e)}")
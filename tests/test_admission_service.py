@@ -0,0 +1,209 @@
+"""
+Tests for admission control and Whisper scheduling
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services import admission_service
+from services.admission_service import AdmissionRejected, AdmissionService, LANE_BATCH, LANE_INTERACTIVE
+
+SEGMENT_SECONDS = 0.05
+
+
+@pytest.fixture(autouse=True)
+def fake_settings(monkeypatch):
+    """Small, fast limits so the scheduler can be exercised in real time"""
+    fake = SimpleNamespace(
+        ADMISSION_TRANSCRIBE_COST_PER_AUDIO_SECOND=0.5,
+        ADMISSION_MAPPING_COST_PER_FIELD=0.3,
+        ADMISSION_FALLBACK_AUDIO_BYTES_PER_SECOND=16000,
+        ADMISSION_BUCKET_CAPACITY=120.0,
+        ADMISSION_BUCKET_REFILL_PER_SECOND=0.5,
+        ADMISSION_BUCKET_IDLE_TTL_SECONDS=600.0,
+        ADMISSION_INTERACTIVE_MAX_AUDIO_SECONDS=30.0,
+        ADMISSION_INTERACTIVE_DEADLINE_SECONDS=30.0,
+        ADMISSION_BATCH_DEADLINE_SECONDS=300.0,
+    )
+    monkeypatch.setattr(admission_service, "settings", fake)
+    return fake
+
+
+class FakeModel:
+    """Stands in for Whisper: records segment order and detects concurrent use"""
+
+    def __init__(self):
+        self.events = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def segments(self, name: str, count: int, seconds_per_segment: float = 30.0):
+        for i in range(count):
+            with self._lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.events.append(f"{name}{i}:start")
+            time.sleep(SEGMENT_SECONDS)
+            with self._lock:
+                self.active -= 1
+                self.events.append(f"{name}{i}:end")
+            yield SimpleNamespace(text=f"{name}{i}", end=(i + 1) * seconds_per_segment)
+
+
+def test_interactive_clip_preempts_running_batch_job():
+    async def scenario():
+        service = AdmissionService()
+        model = FakeModel()
+
+        batch_ticket = service.admit("batch-client", audio_seconds=300, field_count=5)
+        batch = asyncio.create_task(service.run_transcription(batch_ticket, model.segments("B", 10)))
+        await asyncio.sleep(SEGMENT_SECONDS / 2)
+
+        # Not shed: the running batch job yields at its next segment
+        interactive_ticket = service.admit("interactive-client", audio_seconds=5, field_count=5)
+        assert interactive_ticket.lane == LANE_INTERACTIVE
+        text = await service.run_transcription(interactive_ticket, model.segments("I", 1))
+
+        assert text == "I0"
+        assert await batch == " ".join(f"B{i}" for i in range(10))
+        return model
+
+    model = asyncio.run(scenario())
+    assert model.events.index("I0:start") < model.events.index("B9:start")
+    assert model.max_active == 1
+
+
+def test_long_form_on_idle_server_is_admitted():
+    service = AdmissionService()
+    ticket = service.admit("client", audio_seconds=20, field_count=70)
+    assert ticket.lane == LANE_INTERACTIVE
+
+
+def test_too_long_recording_is_rejected_only_when_duration_is_known():
+    service = AdmissionService()
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        service.admit("client", audio_seconds=700, field_count=0)
+    assert exc_info.value.status_code == 413
+    assert exc_info.value.retry_after is None
+
+    ticket = service.admit("client", audio_seconds=700, field_count=0, duration_is_exact=False)
+    assert ticket.lane == LANE_BATCH
+
+
+def test_request_shed_while_queued_is_refunded(fake_settings):
+    fake_settings.ADMISSION_INTERACTIVE_DEADLINE_SECONDS = 3.0
+
+    async def scenario():
+        service = AdmissionService()
+        model = FakeModel()
+
+        # Both admitted on an idle server; the second then outlives its deadline in the queue
+        running = service.admit("first", audio_seconds=5, field_count=0)
+        queued = service.admit("second", audio_seconds=5, field_count=10)
+        tokens_after_admit = queued.bucket.tokens
+        holder = asyncio.create_task(service.run_transcription(running, model.segments("H", 20)))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await service.run_transcription(queued, model.segments("Q", 1))
+        await holder
+        return queued, tokens_after_admit, exc_info.value, model
+
+    queued, tokens_after_admit, rejection, model = asyncio.run(scenario())
+    assert rejection.status_code == 503
+    assert rejection.retry_after is not None
+    assert queued.bucket.tokens >= tokens_after_admit + queued.total_cost - 0.1
+    assert not any(event.startswith("Q") for event in model.events)
+
+
+def test_cost_larger_than_bucket_is_admitted_once_then_rate_limited(fake_settings):
+    fake_settings.ADMISSION_BUCKET_CAPACITY = 10.0
+    service = AdmissionService()
+
+    ticket = service.admit("client", audio_seconds=60, field_count=0)
+    assert ticket.bucket.tokens < 0
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        service.admit("client", audio_seconds=5, field_count=0)
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after > 0
+
+    # Other clients have their own bucket
+    service.admit("other-client", audio_seconds=5, field_count=0)
+
+
+def test_cancel_mid_segment_holds_model_until_segment_returns():
+    async def scenario():
+        service = AdmissionService()
+        model = FakeModel()
+
+        cancelled_ticket = service.admit("c", audio_seconds=5, field_count=0)
+        cancelled = asyncio.create_task(service.run_transcription(cancelled_ticket, model.segments("C", 5)))
+        await asyncio.sleep(SEGMENT_SECONDS / 2)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        next_ticket = service.admit("d", audio_seconds=5, field_count=0)
+        await service.run_transcription(next_ticket, model.segments("D", 1))
+        return service, model
+
+    service, model = asyncio.run(scenario())
+    assert model.events.index("C0:end") < model.events.index("D0:start")
+    assert "C1:start" not in model.events
+    assert model.max_active == 1
+    assert service._running is None
+
+
+def test_cancel_while_queued_refunds_and_leaves_queue():
+    async def scenario():
+        service = AdmissionService()
+        model = FakeModel()
+
+        running = service.admit("first", audio_seconds=5, field_count=0)
+        holder = asyncio.create_task(service.run_transcription(running, model.segments("H", 4)))
+        await asyncio.sleep(0)
+
+        queued = service.admit("second", audio_seconds=5, field_count=0)
+        tokens_after_admit = queued.bucket.tokens
+        waiter = asyncio.create_task(service.run_transcription(queued, model.segments("Q", 1)))
+        await asyncio.sleep(SEGMENT_SECONDS / 2)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await holder
+        return service, queued, tokens_after_admit
+
+    service, queued, tokens_after_admit = asyncio.run(scenario())
+    assert queued.refunded
+    assert queued.bucket.tokens >= tokens_after_admit + queued.total_cost - 0.1
+    assert not service._lanes[LANE_INTERACTIVE]
+    assert service._running is None
+
+
+def test_paused_batch_job_is_shed_when_it_misses_its_deadline(fake_settings):
+    async def scenario():
+        service = AdmissionService()
+        model = FakeModel()
+
+        batch_ticket = service.admit("batch-client", audio_seconds=300, field_count=0)
+        batch = asyncio.create_task(service.run_transcription(batch_ticket, model.segments("B", 10)))
+        await asyncio.sleep(SEGMENT_SECONDS / 2)
+
+        # Leave the batch job no slack once it pauses
+        batch_ticket.deadline = time.monotonic()
+        interactive_ticket = service.admit("interactive-client", audio_seconds=5, field_count=0)
+        await service.run_transcription(interactive_ticket, model.segments("I", 3))
+
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await batch
+        return exc_info.value, model
+
+    rejection, model = asyncio.run(scenario())
+    assert rejection.status_code == 503
+    assert "B9:start" not in model.events